@@ -1,18 +1,62 @@
-from typing import Optional, List, Any, Dict
-
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Optional, List, Any, Dict, FrozenSet, Iterator, Tuple
+import asyncio
+import functools
+import ssl
+import threading
+
+from cachetools import TTLCache
+
+import httpx
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.responses import JSONResponse, StreamingResponse
 from urllib.parse import quote
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.background import BackgroundTask
 import unicodedata
 
 
+# Cliente assíncrono compartilhado pelos endpoints (criado no lifespan)
+CLIENT: Optional[httpx.AsyncClient] = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global CLIENT
+    CLIENT = httpx.AsyncClient(
+        verify=VERIFY_SSL,
+        timeout=20,
+        follow_redirects=True,
+        # keepalive_expiry padrão do httpx é 5s: sem aumentar, a conexão
+        # aquecida abaixo fecharia antes de chegar tráfego de verdade
+        limits=httpx.Limits(max_keepalive_connections=64, keepalive_expiry=60),
+    )
+
+    # "preconnect": abre (DNS + TCP + TLS) a conexão com a VTEX já no startup,
+    # para o primeiro request de verdade não pagar o handshake.
+    # Falha de rede aqui nunca impede a aplicação de subir.
+    try:
+        await CLIENT.head(MD_BASE_URL, timeout=5)
+    except httpx.HTTPError:
+        pass
+
+    try:
+        yield
+    finally:
+        await CLIENT.aclose()
+        CLIENT = None
+
 
 app = FastAPI(
     title="Backend Maria Dolores",
     description="Proxy para API VTEX da Maria Dolores com enriquecimento de dados",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # 🔓 CORS liberado para qualquer origem (inclui Base44, localhost, etc.)
@@ -33,6 +77,78 @@ MD_BASE_URL = "https://www.mariadolores.com.br/api/catalog_system/pub/products/s
 # precisamos desabilitar a verificação do certificado para funcionar.
 VERIFY_SSL = False  # em casa/pessoal você pode deixar True, se quiser
 
+# Máximo de chamadas simultâneas à VTEX no endpoint em lote (rate limit)
+VTEX_MAX_CONCORRENCIA = 8
+_VTEX_SEMAFORO = asyncio.Semaphore(VTEX_MAX_CONCORRENCIA)
+
+# Máximo de códigos aceitos por request no endpoint em lote
+MAX_CODIGOS_BATCH = 50
+
+# Tamanho dos blocos repassados pelo /image-proxy (menos syscalls em JPEGs grandes)
+IMAGE_CHUNK_SIZE = 64 * 1024
+
+# Sessão síncrona compartilhada (usada pelos helpers fora dos endpoints):
+# reaproveita as conexões (keep-alive) com a VTEX
+# em vez de abrir um TCP + TLS novo a cada chamada.
+SESSION = requests.Session()
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=64,
+        max_retries=Retry(
+            total=2,
+            backoff_factor=0.2,
+            status_forcelist=[429, 502, 503, 504],
+        ),
+    ),
+)
+
+
+# ==============================================================
+# Catálogo VTEX por código (com cache em memória)
+# ==============================================================
+
+# Resposta crua de search/{codigo} + índice já normalizado (ver build_index).
+# A UI costuma trocar só banho/pedra para o mesmo código, então só a chamada
+# à VTEX é cacheada (não o resultado do filtro).
+_PRODUTOS_CACHE: TTLCache = TTLCache(maxsize=512, ttl=60)
+_PRODUTOS_CACHE_LOCK = threading.Lock()
+
+Catalogo = Tuple[List[Dict[str, Any]], List["IndexedProd"]]
+
+
+def _catalogo_do_cache(codigo: str) -> Optional[Catalogo]:
+    with _PRODUTOS_CACHE_LOCK:
+        return _PRODUTOS_CACHE.get(codigo)
+
+
+def _guardar_catalogo(codigo: str, dados: Any) -> Catalogo:
+    produtos = dados if isinstance(dados, list) else []
+    # enriquece uma vez só aqui: quem lê do cache já recebe coleção / preços
+    for prod in produtos:
+        enriquecer_produto(prod)
+    catalogo = (produtos, build_index(produtos))
+    with _PRODUTOS_CACHE_LOCK:
+        _PRODUTOS_CACHE[codigo] = catalogo
+    return catalogo
+
+
+async def fetch_indice(codigo: str) -> List["IndexedProd"]:
+    """
+    Retorna o índice (build_index) dos produtos da VTEX para o código
+    (search/{codigo}), já passados por enriquecer_produto.
+    Erros de rede / HTTP sobem como httpx.HTTPError (e não são cacheados).
+    """
+    catalogo = _catalogo_do_cache(codigo)
+    if catalogo is None:
+        resp = await CLIENT.get(f"{MD_BASE_URL}{codigo}")
+        resp.raise_for_status()
+        catalogo = _guardar_catalogo(codigo, orjson.loads(resp.content))
+
+    _, indice = catalogo
+    return indice
+
 
 # ==============================================================
 # Helpers de normalização / escolha de SKU e imagem
@@ -41,10 +157,18 @@ VERIFY_SSL = False  # em casa/pessoal você pode deixar True, se quiser
 def normalizar_texto(s: Optional[str]) -> str:
     if not s:
         return ""
+    return _normalizar_texto_cached(s)
+
+
+@functools.lru_cache(maxsize=4096)
+def _normalizar_texto_cached(s: str) -> str:
+    # os mesmos códigos / banhos / pedras se repetem muito entre produtos e requests
     s = s.strip().upper()
-    s = unicodedata.normalize("NFD", s)
-    s = "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
-    return s
+    # referências VTEX (ex: MD2116.FO.907) quase sempre são ASCII puro
+    if s.isascii():
+        return s
+    decomposto = unicodedata.normalize("NFD", s)
+    return "".join(ch for ch in decomposto if not unicodedata.combining(ch))
 
 
 def escolher_melhor_imagem(item: Dict[str, Any]) -> Optional[str]:
@@ -53,75 +177,162 @@ def escolher_melhor_imagem(item: Dict[str, Any]) -> Optional[str]:
         return None
 
     # 1) tenta uma imagem "normal" (sem label ou label vazio)
-    for img in imagens:
-        label = (img.get("imageLabel") or "").strip()
-        if not label:
-            return img.get("imageUrl")
-
     # 2) se não tiver, pega a primeira mesmo
-    return imagens[0].get("imageUrl")
+    return next(
+        (img.get("imageUrl") for img in imagens if not (img.get("imageLabel") or "").strip()),
+        imagens[0].get("imageUrl"),
+    )
 
 
-def _listar_opcoes_sku_imagem(
-    produtos: List[Dict[str, Any]],
+@functools.lru_cache(maxsize=4096)
+def _proxied_path(url: str) -> str:
+    # com o cache da VTEX as mesmas URLs se repetem: o quote() só roda uma vez por URL
+    return "/image-proxy?url=" + quote(url, safe="")
+
+
+# ==============================================================
+# Índice pré-normalizado dos produtos de um código
+# ==============================================================
+
+@dataclass(slots=True)
+class IndexedItem:
+    item: Dict[str, Any]
+    banhos_norm: Tuple[str, ...]
+    banhos_norm_set: FrozenSet[str]
+    banhos_blob: str
+    banho_label: Optional[str]
+    image_url: Optional[str]
+
+
+@dataclass(slots=True)
+class IndexedProd:
+    prod: Dict[str, Any]
+    prod_ref: str
+    prod_ref_norm: str
+    pedras_norm: Tuple[str, ...]
+    pedras_norm_set: FrozenSet[str]
+    pedras_blob: str
+    pedra_label: Optional[str]
+    items: Tuple[IndexedItem, ...]
+
+
+def build_index(produtos: List[Dict[str, Any]]) -> List[IndexedProd]:
+    """
+    Normaliza uma única vez (por resposta da VTEX) tudo o que os filtros
+    de código / banho / pedra usam, além de já escolher a imagem de cada SKU.
+
+    Os *_blob juntam as tags com "\x00" (que nunca aparece nelas): assim a busca
+    parcial vira um único `in` na string, sem casar pedaços de duas tags.
+    Os *_set resolvem em O(1) o caso comum de a tag vir completa.
+    """
+    indice: List[IndexedProd] = []
+
+    for prod in produtos:
+        prod_ref = prod.get("productReference") or prod.get("productReferenceCode") or ""
+        pedras = prod.get("Pedras") or []
+        pedras_norm = tuple(normalizar_texto(p) for p in pedras)
+
+        items = []
+        for item in prod.get("items", []):
+            banhos = item.get("Banho") or []
+            banhos_norm = tuple(normalizar_texto(b) for b in banhos)
+            items.append(
+                IndexedItem(
+                    item=item,
+                    banhos_norm=banhos_norm,
+                    banhos_norm_set=frozenset(banhos_norm),
+                    banhos_blob="\x00".join(banhos_norm),
+                    banho_label=banhos[0] if banhos else None,
+                    image_url=escolher_melhor_imagem(item),
+                )
+            )
+
+        indice.append(
+            IndexedProd(
+                prod=prod,
+                prod_ref=prod_ref,
+                prod_ref_norm=normalizar_texto(prod_ref),
+                pedras_norm=pedras_norm,
+                pedras_norm_set=frozenset(pedras_norm),
+                pedras_blob="\x00".join(pedras_norm),
+                pedra_label=pedras[0] if pedras else None,
+                items=tuple(items),
+            )
+        )
+
+    return indice
+
+
+def _filtrar_indice(
+    indice: List[IndexedProd],
     codigo: str,
     banho: Optional[str],
     pedra: Optional[str],
-) -> List[Dict[str, Any]]:
+) -> Iterator[Tuple[IndexedProd, IndexedItem]]:
     """
-    Função interna que aplica a MESMA lógica de filtro usada em /md/sku-image-options
-    e retorna uma lista de opções de imagem para (código, banho, pedra).
+    Lógica de filtro de /md/sku-image-options: devolve os pares (produto, SKU)
+    que batem com (código, banho, pedra) e que têm imagem.
     """
     codigo_norm = normalizar_texto(codigo)
     banho_norm = normalizar_texto(banho) if banho else ""
     pedra_norm = normalizar_texto(pedra) if pedra else ""
 
-    opcoes: List[Dict[str, Any]] = []
+    # filtro básico por código (igual se vier com ponto, ou começa com se vier só MD2116),
+    # decidido uma vez só em vez de a cada produto
+    if "." in codigo_norm:
+        match_code = lambda ref: ref == codigo_norm  # noqa: E731
+    else:
+        match_code = lambda ref: ref.startswith(codigo_norm)  # noqa: E731
 
-    for prod in produtos:
-        prod_ref = prod.get("productReference") or prod.get("productReferenceCode") or ""
-        prod_ref_norm = normalizar_texto(prod_ref)
+    has_banho = bool(banho_norm)
+    has_pedra = bool(pedra_norm)
 
-        # filtro básico por código (começando com MD2116, etc.)
-        if "." in codigo_norm:
-            if prod_ref_norm != codigo_norm:
-                continue
-        else:
-            if not prod_ref_norm.startswith(codigo_norm):
-                continue
+    for prod in indice:
+        if not match_code(prod.prod_ref_norm):
+            continue
 
-        pedras = prod.get("Pedras") or []
-        pedras_norm = [normalizar_texto(p) for p in pedras]
-        pedra_label = pedras[0] if pedras else None
+        # pedra é do produto, não do SKU: se não bate, nenhum item serve
+        if has_pedra and not (
+            pedra_norm in prod.pedras_norm_set or pedra_norm in prod.pedras_blob
+        ):
+            continue
 
-        for item in prod.get("items", []):
-            banhos = item.get("Banho") or []
-            banhos_norm = [normalizar_texto(b) for b in banhos]
-            banho_label = banhos[0] if banhos else None
+        for item in prod.items:
+            if has_banho and not (
+                banho_norm in item.banhos_norm_set or banho_norm in item.banhos_blob
+            ):
+                continue
 
-            # filtros "semânticos"
-            if banho_norm:
-                if not any(banho_norm in b for b in banhos_norm):
-                    continue
+            if not item.image_url:
+                continue
 
-            if pedra_norm:
-                if not any(pedra_norm in p for p in pedras_norm):
-                    continue
+            yield prod, item
 
-            image_url = escolher_melhor_imagem(item)
-            if not image_url:
-                continue
 
-            opcoes.append(
-                {
-                    "codigo": prod_ref,
-                    "banho": banho_label,
-                    "pedra": pedra_label,
-                    "image_url": image_url,
-                }
-            )
+def _listar_opcoes_sku_imagem(
+    produtos: List[Dict[str, Any]],
+    codigo: str,
+    banho: Optional[str],
+    pedra: Optional[str],
+    indice: Optional[List[IndexedProd]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Função interna que aplica a MESMA lógica de filtro usada em /md/sku-image-options
+    e retorna uma lista de opções de imagem para (código, banho, pedra).
+    Se o índice desses produtos já existir (cache), ele é reaproveitado.
+    """
+    if indice is None:
+        indice = build_index(produtos)
 
-    return opcoes
+    return [
+        {
+            "codigo": prod.prod_ref,
+            "banho": item.banho_label,
+            "pedra": prod.pedra_label,
+            "image_url": item.image_url,
+        }
+        for prod, item in _filtrar_indice(indice, codigo, banho, pedra)
+    ]
 
 
 def escolher_sku(
@@ -133,41 +344,23 @@ def escolher_sku(
     """
     ⚠ Hoje essa função não é usada em nenhum endpoint.
       Mantive por compatibilidade, caso você esteja importando em outro lugar.
+      Usa o mesmo índice (build_index) de /md/sku-image-options, mas com filtros
+      "macios": banho / pedra só restringem se sobrar algum candidato.
     """
     codigo_norm = normalizar_texto(codigo)
     banho_norm = normalizar_texto(banho) if banho else ""
     pedra_norm = normalizar_texto(pedra) if pedra else ""
 
-    skus = []
-    for prod in produtos:
-        prod_ref = prod.get("productReference") or prod.get("productReferenceCode") or ""
-        prod_ref_norm = normalizar_texto(prod_ref)
-
-        pedras = prod.get("Pedras") or []
-        pedras_norm = [normalizar_texto(p) for p in pedras]
-
-        for item in prod.get("items", []):
-            banhos = item.get("Banho") or []
-            banhos_norm = [normalizar_texto(b) for b in banhos]
-
-            skus.append(
-                {
-                    "produto": prod,
-                    "item": item,
-                    "codigo_norm": prod_ref_norm,
-                    "banhos_norm": banhos_norm,
-                    "pedras_norm": pedras_norm,
-                }
-            )
+    skus = [(prod, item) for prod in build_index(produtos) for item in prod.items]
 
     if not skus:
         return None
 
     # 2) filtro por código (igual ou começa com)
     if "." in codigo_norm:
-        candidatos = [s for s in skus if s["codigo_norm"] == codigo_norm]
+        candidatos = [s for s in skus if s[0].prod_ref_norm == codigo_norm]
     else:
-        candidatos = [s for s in skus if s["codigo_norm"].startswith(codigo_norm)]
+        candidatos = [s for s in skus if s[0].prod_ref_norm.startswith(codigo_norm)]
 
     if not candidatos:
         return None
@@ -177,25 +370,31 @@ def escolher_sku(
         cand_banho = [
             s
             for s in candidatos
-            if any(banho_norm == b or banho_norm in b for b in s["banhos_norm"])
+            if banho_norm in s[1].banhos_norm_set or banho_norm in s[1].banhos_blob
         ]
         if cand_banho:
             candidatos = cand_banho
 
     # 4) filtro por pedra (se informada)
     if pedra_norm:
-        cand_pedra = []
-        for s in candidatos:
-            pedras_norm = s["pedras_norm"]
-            if any(
-                pedra_norm == p or pedra_norm in p or p in pedra_norm
-                for p in pedras_norm
-            ):
-                cand_pedra.append(s)
+        cand_pedra = [
+            s
+            for s in candidatos
+            if pedra_norm in s[0].pedras_norm_set
+            or pedra_norm in s[0].pedras_blob
+            or any(p in pedra_norm for p in s[0].pedras_norm)
+        ]
         if cand_pedra:
             candidatos = cand_pedra
 
-    return candidatos[0] if candidatos else None
+    prod, item = candidatos[0]
+    return {
+        "produto": prod.prod,
+        "item": item.item,
+        "codigo_norm": prod.prod_ref_norm,
+        "banhos_norm": list(item.banhos_norm),
+        "pedras_norm": list(prod.pedras_norm),
+    }
 
 
 def buscar_imagem_por_codigo_pedra_banho(
@@ -211,21 +410,25 @@ def buscar_imagem_por_codigo_pedra_banho(
     Agora usa a mesma lógica de filtro do endpoint /md/sku-image-options
     (via _listar_opcoes_sku_imagem).
     """
-    try:
-        resp = requests.get(
-            f"{MD_BASE_URL}{codigo}",
-            verify=VERIFY_SSL,
-            timeout=10,
-        )
-        resp.raise_for_status()
-    except requests.RequestException:
-        return None
+    catalogo = _catalogo_do_cache(codigo)
+    if catalogo is None:
+        try:
+            resp = SESSION.get(
+                f"{MD_BASE_URL}{codigo}",
+                verify=VERIFY_SSL,
+                timeout=10,
+            )
+            resp.raise_for_status()
+        except requests.RequestException:
+            return None
 
-    produtos = resp.json()
-    if not isinstance(produtos, list) or not produtos:
+        catalogo = _guardar_catalogo(codigo, orjson.loads(resp.content))
+
+    produtos, indice = catalogo
+    if not produtos:
         return None
 
-    opcoes = _listar_opcoes_sku_imagem(produtos, codigo, banho, pedra)
+    opcoes = _listar_opcoes_sku_imagem(produtos, codigo, banho, pedra, indice)
     if not opcoes:
         return None
 
@@ -260,28 +463,31 @@ def enriquecer_produto(prod: Dict[str, Any]) -> Dict[str, Any]:
     preco_sem_desc = None
     percentual_desconto = None
 
-    items: List[Dict[str, Any]] = prod.get("items") or []
+    # "or ()" evita alocar uma lista vazia por produto quando a chave vem vazia / None
+    items = prod.get("items") or ()
     if items:
         item0 = items[0]
 
         # Imagem principal
-        imagens = item0.get("images") or []
+        imagens = item0.get("images") or ()
         if imagens:
             imagem = imagens[0].get("imageUrl")
 
         # Preços (seller principal)
-        sellers = item0.get("sellers") or []
+        sellers = item0.get("sellers") or ()
         if sellers:
             offer = (sellers[0] or {}).get("commertialOffer") or {}
             preco = offer.get("Price")
             preco_lista = offer.get("ListPrice")
             preco_sem_desc = offer.get("PriceWithoutDiscount")
 
-            try:
-                if preco is not None and preco_lista and preco_lista > 0:
-                    percentual_desconto = (1 - (preco / preco_lista)) * 100
-            except Exception:
-                percentual_desconto = None
+            # a VTEX às vezes manda lixo (string, None): só calcula com números de verdade
+            if (
+                isinstance(preco, (int, float))
+                and isinstance(preco_lista, (int, float))
+                and preco_lista > 0
+            ):
+                percentual_desconto = (1 - (preco / preco_lista)) * 100
 
     resumo = {
         "colecao_principal": colecao,
@@ -292,12 +498,7 @@ def enriquecer_produto(prod: Dict[str, Any]) -> Dict[str, Any]:
         "percentual_desconto": percentual_desconto,
     }
 
-    prod["colecao_principal"] = colecao
-    prod["imagem_principal"] = imagem
-    prod["preco"] = preco
-    prod["preco_lista"] = preco_lista
-    prod["preco_sem_desconto"] = preco_sem_desc
-    prod["percentual_desconto"] = percentual_desconto
+    prod.update(resumo)
     prod["md_resumo"] = resumo
 
     return prod
@@ -307,8 +508,21 @@ def enriquecer_produto(prod: Dict[str, Any]) -> Dict[str, Any]:
 # Endpoints
 # ==============================================================
 
+def _eh_erro_ssl(e: BaseException) -> bool:
+    """
+    O httpx não tem uma exceção própria para SSL: o ssl.SSLError
+    vem encadeado (__cause__ / __context__) dentro de um ConnectError.
+    """
+    atual: Optional[BaseException] = e
+    while atual is not None:
+        if isinstance(atual, ssl.SSLError):
+            return True
+        atual = atual.__cause__ or atual.__context__
+    return False
+
+
 @app.get("/md/search")
-def search_md(
+async def search_md(
     ft: Optional[str] = Query(
         default=None,
         description="Texto de busca (mesmo campo 'ft' usado no site / VTEX)",
@@ -326,29 +540,24 @@ def search_md(
         params["productId"] = productId
 
     try:
-        resp = requests.get(
-            MD_BASE_URL,
-            params=params,
-            timeout=20,
-            verify=VERIFY_SSL,
-        )
+        resp = await CLIENT.get(MD_BASE_URL, params=params)
         resp.raise_for_status()
-    except requests.exceptions.SSLError as e:
-        raise HTTPException(
-            status_code=502,
-            detail=(
-                "Erro SSL ao chamar API Maria Dolores "
-                "(provavelmente certificado da rede corporativa). "
-                f"Detalhe técnico: {e}"
-            ),
-        )
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
+        if _eh_erro_ssl(e):
+            raise HTTPException(
+                status_code=502,
+                detail=(
+                    "Erro SSL ao chamar API Maria Dolores "
+                    "(provavelmente certificado da rede corporativa). "
+                    f"Detalhe técnico: {e}"
+                ),
+            )
         raise HTTPException(
             status_code=502,
             detail=f"Erro ao chamar API Maria Dolores: {e}",
         )
 
-    dados = resp.json()
+    dados = orjson.loads(resp.content)
 
     if isinstance(dados, list):
         dados = [enriquecer_produto(p) for p in dados]
@@ -359,33 +568,99 @@ def search_md(
 
 
 @app.get("/image-proxy")
-def image_proxy(
+async def image_proxy(
     url: str = Query(..., description="URL absoluta da imagem na VTEX"),
 ):
+    r: Optional[httpx.Response] = None
     try:
-        r = requests.get(url, stream=True, timeout=20, verify=VERIFY_SSL)
+        r = await CLIENT.send(CLIENT.build_request("GET", url), stream=True)
         r.raise_for_status()
-    except requests.exceptions.SSLError as e:
-        raise HTTPException(
-            status_code=502,
-            detail=(
-                "Erro SSL ao baixar imagem da VTEX "
-                "(provavelmente certificado da rede corporativa). "
-                f"Detalhe técnico: {e}"
-            ),
-        )
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
+        if r is not None:
+            await r.aclose()
+        if _eh_erro_ssl(e):
+            raise HTTPException(
+                status_code=502,
+                detail=(
+                    "Erro SSL ao baixar imagem da VTEX "
+                    "(provavelmente certificado da rede corporativa). "
+                    f"Detalhe técnico: {e}"
+                ),
+            )
         raise HTTPException(
             status_code=502,
             detail=f"Erro ao baixar imagem da VTEX: {e}",
         )
 
     content_type = r.headers.get("Content-Type", "image/jpeg")
-    return StreamingResponse(r.raw, media_type=content_type)
+
+    # repassa os headers que deixam o navegador cachear / dimensionar a imagem
+    headers: Dict[str, str] = {}
+    if "Cache-Control" in r.headers:
+        headers["Cache-Control"] = r.headers["Cache-Control"]
+    # aiter_bytes já decodifica gzip etc., então o tamanho só vale sem Content-Encoding
+    if "Content-Length" in r.headers and "Content-Encoding" not in r.headers:
+        headers["Content-Length"] = r.headers["Content-Length"]
+
+    # a resposta da VTEX só é fechada depois que o corpo terminar de ser enviado
+    return StreamingResponse(
+        r.aiter_bytes(chunk_size=IMAGE_CHUNK_SIZE),
+        media_type=content_type,
+        headers=headers,
+        background=BackgroundTask(r.aclose),
+    )
+
+
+def _montar_opcoes(
+    indice: List[IndexedProd],
+    codigo: str,
+    banho: Optional[str],
+    pedra: Optional[str],
+) -> List[Dict[str, Any]]:
+    """
+    Monta o "dicionário resumido" de /md/sku-image-options para cada SKU
+    do índice que bate com (código, banho, pedra).
+    """
+    opcoes = []
+
+    # os produtos do índice já vêm enriquecidos (coleção, preços, imagem_principal, etc.)
+    for ip, it in _filtrar_indice(indice, codigo, banho, pedra):
+        prod = ip.prod
+        image_url = it.image_url
+
+        # monta a URL proxied usando o próprio backend
+        proxied_url = _proxied_path(image_url)  # no front você prefixa com o host do backend
+
+        # 🔹 aqui montamos o "dicionário resumido" para cada opção
+        opcoes.append({
+            "productId": prod.get("productId"),
+            "codigo_completo": ip.prod_ref,  # ex: MD2116.FO.970
+            "codigo_busca": codigo,        # o que o usuário mandou
+            "banho": it.banho_label,
+            "pedra": ip.pedra_label,
+
+            # infos de produto / coleção
+            "nome": prod.get("productName"),
+            "colecao_principal": prod.get("colecao_principal"),
+            "link": prod.get("link"),
+
+            # preços já enriquecidos
+            "preco": prod.get("preco"),
+            "preco_lista": prod.get("preco_lista"),
+            "preco_sem_desconto": prod.get("preco_sem_desconto"),
+            "percentual_desconto": prod.get("percentual_desconto"),
+
+            # imagens
+            "imagem_principal": prod.get("imagem_principal"),  # do enriquecimento
+            "image_url": image_url,        # desse SKU específico
+            "proxied_url": proxied_url,    # passando pelo seu backend
+        })
+
+    return opcoes
 
 
 @app.get("/md/sku-image-options")
-def sku_image_options(
+async def sku_image_options(
     codigo: str = Query(..., description="Código base, ex: 'MD2116' ou 'MD2116.FO.907'"),
     banho: Optional[str] = Query(None, description="Banho, pode ser parcial, ex: 'ouro'"),
     pedra: Optional[str] = Query(None, description="Pedra, pode ser parcial, ex: 'ágata'"),
@@ -401,93 +676,16 @@ def sku_image_options(
     Esse endpoint é o "resumido" para uso no Base44 / frontend.
     """
 
-    # 1) chama VTEX
+    # 1) chama VTEX (ou reaproveita o cache do mesmo código)
     try:
-        resp = requests.get(
-            f"{MD_BASE_URL}{codigo}",
-            timeout=20,
-            verify=VERIFY_SSL,
-        )
-        resp.raise_for_status()
-    except requests.RequestException as e:
+        indice = await fetch_indice(codigo)
+    except httpx.HTTPError as e:
         raise HTTPException(status_code=502, detail=f"Erro ao consultar VTEX: {e}")
 
-    produtos = resp.json()
-    if not isinstance(produtos, list) or not produtos:
+    if not indice:
         raise HTTPException(status_code=404, detail="Nenhum produto encontrado")
 
-    # normalizações de busca
-    codigo_norm = normalizar_texto(codigo)
-    banho_norm = normalizar_texto(banho) if banho else ""
-    pedra_norm = normalizar_texto(pedra) if pedra else ""
-
-    opcoes = []
-
-    for prod in produtos:
-        # 🔹 já enriquecemos aqui (coleção, preços, imagem_principal, etc.)
-        prod = enriquecer_produto(prod)
-
-        prod_ref = prod.get("productReference") or prod.get("productReferenceCode") or ""
-        prod_ref_norm = normalizar_texto(prod_ref)
-
-        # filtro básico por código (igual se vier com ponto, ou começa com se vier só MD2116)
-        if "." in codigo_norm:
-            if prod_ref_norm != codigo_norm:
-                continue
-        else:
-            if not prod_ref_norm.startswith(codigo_norm):
-                continue
-
-        pedras = prod.get("Pedras") or []
-        pedras_norm = [normalizar_texto(p) for p in pedras]
-        pedra_label = pedras[0] if pedras else None
-
-        for item in prod.get("items", []):
-            banhos = item.get("Banho") or []
-            banhos_norm = [normalizar_texto(b) for b in banhos]
-            banho_label = banhos[0] if banhos else None
-
-            # filtros "semânticos"
-            if banho_norm:
-                if not any(banho_norm in b for b in banhos_norm):
-                    continue
-
-            if pedra_norm:
-                if not any(pedra_norm in p for p in pedras_norm):
-                    continue
-
-            image_url = escolher_melhor_imagem(item)
-            if not image_url:
-                continue
-
-            # monta a URL proxied usando o próprio backend
-            proxied_path = f"/image-proxy?url={quote(image_url, safe='')}"
-            proxied_url = proxied_path  # no front você prefixa com o host do backend
-
-            # 🔹 aqui montamos o "dicionário resumido" para cada opção
-            opcoes.append({
-                "productId": prod.get("productId"),
-                "codigo_completo": prod_ref,  # ex: MD2116.FO.970
-                "codigo_busca": codigo,        # o que o usuário mandou
-                "banho": banho_label,
-                "pedra": pedra_label,
-
-                # infos de produto / coleção
-                "nome": prod.get("productName"),
-                "colecao_principal": prod.get("colecao_principal"),
-                "link": prod.get("link"),
-
-                # preços já enriquecidos
-                "preco": prod.get("preco"),
-                "preco_lista": prod.get("preco_lista"),
-                "preco_sem_desconto": prod.get("preco_sem_desconto"),
-                "percentual_desconto": prod.get("percentual_desconto"),
-
-                # imagens
-                "imagem_principal": prod.get("imagem_principal"),  # do enriquecimento
-                "image_url": image_url,        # desse SKU específico
-                "proxied_url": proxied_url,    # passando pelo seu backend
-            })
+    opcoes = _montar_opcoes(indice, codigo, banho, pedra)
 
     if not opcoes:
         raise HTTPException(
@@ -497,3 +695,44 @@ def sku_image_options(
 
     return opcoes
 
+
+@app.get("/md/sku-image-options/batch")
+async def sku_image_options_batch(
+    codigos: List[str] = Query(..., description="Vários códigos base, ex: ?codigos=MD2116&codigos=MD3000"),
+    banho: Optional[str] = Query(None, description="Banho, pode ser parcial, ex: 'ouro'"),
+    pedra: Optional[str] = Query(None, description="Pedra, pode ser parcial, ex: 'ágata'"),
+):
+    """
+    Versão em lote de /md/sku-image-options: consulta a VTEX em paralelo
+    (no máximo VTEX_MAX_CONCORRENCIA chamadas ao mesmo tempo) e devolve
+    {codigo: [opcoes]}. Código sem nenhuma combinação volta com lista vazia.
+    Se a VTEX falhar para um código, só ele volta como {"erro": "..."}:
+    os demais resultados são mantidos.
+    """
+    codigos = list(dict.fromkeys(codigos))  # remove repetidos mantendo a ordem
+
+    if len(codigos) > MAX_CODIGOS_BATCH:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Máximo de {MAX_CODIGOS_BATCH} códigos por request",
+        )
+
+    async def buscar(codigo: str) -> List[IndexedProd]:
+        async with _VTEX_SEMAFORO:
+            return await fetch_indice(codigo)
+
+    indices = await asyncio.gather(
+        *[buscar(c) for c in codigos],
+        return_exceptions=True,
+    )
+
+    resultado: Dict[str, Any] = {}
+    for codigo, indice in zip(codigos, indices):
+        if isinstance(indice, httpx.HTTPError):
+            resultado[codigo] = {"erro": f"Erro ao consultar VTEX: {indice}"}
+        elif isinstance(indice, BaseException):
+            raise indice
+        else:
+            resultado[codigo] = _montar_opcoes(indice, codigo, banho, pedra)
+
+    return resultado